@@ -0,0 +1,321 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import hnswlib
+import numpy as np
+from cachetools import TTLCache
+
+
+class EmbeddingCache:
+    def __init__(self, maxsize: int = 2000, ttl: float = 300.0):
+        """
+        テキスト埋め込みのLRU+TTLキャッシュ
+        Args:
+            maxsize: 保持するエントリの最大数
+            ttl: エントリの有効期限 (秒)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        # text -> (保存時刻, ベクトル, 所有する動画ID)
+        self._entries: (
+            "OrderedDict[str, Tuple[float, Tuple[float, ...], Optional[str]]]"
+        ) = OrderedDict()
+        # 動画ID -> その動画に紐づくテキストの集合
+        self._owners: Dict[str, Set[str]] = {}
+        # Flaskのスレッド実行に備えたロック
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """
+        キャッシュからベクトルを取得 (期限切れのエントリは破棄)
+        Args:
+            text: 入力テキスト
+        Returns:
+            Optional[List[float]]: キャッシュ済みのベクトル、なければNone
+        """
+        with self._lock:
+            entry = self._entries.get(text)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, vector, _ = entry
+            if time.monotonic() - stored_at > self.ttl:
+                self._remove(text)
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(text)
+            self.hits += 1
+            return list(vector)
+
+    def set(self, text: str, vector: List[float], owner: Optional[str] = None) -> None:
+        """
+        ベクトルをキャッシュに保存 (上限を超えた場合は最も古いエントリを破棄)
+        Args:
+            text: 入力テキスト
+            vector: ベクトル埋め込み
+            owner: テキストを所有する動画ID
+        """
+        with self._lock:
+            if text in self._entries:
+                self._remove(text)
+
+            self._entries[text] = (time.monotonic(), tuple(vector), owner)
+            if owner is not None:
+                self._owners.setdefault(owner, set()).add(text)
+
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, owner: str) -> int:
+        """
+        指定した動画IDに紐づくエントリを破棄
+        Args:
+            owner: 動画ID
+        Returns:
+            int: 破棄したエントリ数
+        """
+        with self._lock:
+            texts = self._owners.pop(owner, set())
+            for text in texts:
+                self._entries.pop(text, None)
+            return len(texts)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        キャッシュの統計情報を取得
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def _remove(self, text: str) -> None:
+        _, _, owner = self._entries.pop(text)
+        if owner is not None:
+            texts = self._owners.get(owner)
+            if texts is not None:
+                texts.discard(text)
+                if not texts:
+                    del self._owners[owner]
+
+
+class SemanticResultCache:
+    def __init__(
+        self,
+        dim: int,
+        max_elements: int = 10000,
+        threshold: float = 0.97,
+        ttl: float = 120.0,
+    ):
+        """
+        クエリベクトルの類似度で検索結果を再利用するキャッシュ
+        Args:
+            dim: クエリベクトルの次元数
+            max_elements: 保持する検索結果の最大数
+            threshold: キャッシュを再利用するコサイン類似度の下限
+            ttl: エントリの有効期限 (秒)
+        """
+        self.dim = dim
+        self.max_elements = max_elements
+        self.threshold = threshold
+        self.ttl = ttl
+
+        self._index: Optional[hnswlib.Index] = None
+        # ラベル -> (保存時刻, 検索時のlimit, 検索結果)
+        self._results: Dict[int, Tuple[float, int, List[Dict[str, Any]]]] = {}
+        # 挿入順のラベル (上限を超えた場合は古いものから置き換える)
+        self._labels: Deque[int] = deque()
+        self._next_label = 0
+        self._lock = threading.Lock()
+
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, query_embedding: List[float], limit: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        類似したクエリの検索結果を取得
+        Args:
+            query_embedding: 検索クエリのベクトル
+            limit: 返す結果の最大数
+        Returns:
+            Optional[List[Dict]]: キャッシュ済みの検索結果、なければNone
+        """
+        with self._lock:
+            self._remove_expired()
+            if not self._results:
+                self.misses += 1
+                return None
+
+            labels, distances = self._index.knn_query(
+                np.asarray(query_embedding, dtype=np.float32), k=1
+            )
+            label = int(labels[0][0])
+            _, cached_limit, results = self._results[label]
+
+            # コサイン距離 (1 - 類似度) が閾値を超える、または件数が足りない場合は利用しない
+            if distances[0][0] > 1 - self.threshold or cached_limit < limit:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return results[:limit]
+
+    def set(
+        self, query_embedding: List[float], limit: int, results: List[Dict[str, Any]]
+    ) -> None:
+        """
+        検索結果をキャッシュに保存
+        Args:
+            query_embedding: 検索クエリのベクトル
+            limit: 検索時の結果の最大数
+            results: 検索結果
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = hnswlib.Index(space="cosine", dim=self.dim)
+                self._index.init_index(
+                    max_elements=self.max_elements, allow_replace_deleted=True
+                )
+
+            self._remove_expired()
+            if len(self._results) >= self.max_elements:
+                self._remove_oldest()
+
+            label = self._next_label
+            self._next_label += 1
+            self._index.add_items(
+                np.asarray([query_embedding], dtype=np.float32),
+                [label],
+                replace_deleted=True,
+            )
+            self._results[label] = (time.monotonic(), limit, results)
+            self._labels.append(label)
+
+    def invalidate(self) -> None:
+        """
+        インデックスの更新に合わせて全ての検索結果を破棄
+        """
+        with self._lock:
+            self.generation += 1
+            self._index = None
+            self._results.clear()
+            self._labels.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        キャッシュの統計情報を取得
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._results),
+                "maxsize": self.max_elements,
+                "generation": self.generation,
+            }
+
+    def _remove_expired(self) -> None:
+        # 全エントリの有効期限は同じため、期限切れのエントリは常に挿入順の先頭に並ぶ
+        now = time.monotonic()
+        while self._labels and now - self._results[self._labels[0]][0] > self.ttl:
+            self._remove_oldest()
+
+    def _remove_oldest(self) -> None:
+        oldest = self._labels.popleft()
+        self._index.mark_deleted(oldest)
+        del self._results[oldest]
+
+
+class QuantizedResultCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 120.0):
+        """
+        int8に量子化したクエリベクトルをキーとする検索結果のTTLキャッシュ
+        Args:
+            maxsize: 保持する検索結果の最大数
+            ttl: エントリの有効期限 (秒)
+        """
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # TTLCacheはスレッドセーフではないためロックで保護する
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, query_embedding: List[float], limit: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        量子化後に同一となるクエリの検索結果を取得
+        Args:
+            query_embedding: 検索クエリのベクトル
+            limit: 返す結果の最大数
+        Returns:
+            Optional[List[Dict]]: キャッシュ済みの検索結果、なければNone
+        """
+        key = self._make_key(query_embedding, limit)
+        with self._lock:
+            results = self._cache.get(key)
+            if results is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return results
+
+    def set(
+        self, query_embedding: List[float], limit: int, results: List[Dict[str, Any]]
+    ) -> None:
+        """
+        検索結果をキャッシュに保存
+        Args:
+            query_embedding: 検索クエリのベクトル
+            limit: 検索時の結果の最大数
+            results: 検索結果
+        """
+        key = self._make_key(query_embedding, limit)
+        with self._lock:
+            self._cache[key] = results
+
+    def invalidate(self) -> None:
+        """
+        インデックスの更新に合わせて全ての検索結果を破棄
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        キャッシュの統計情報を取得
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "maxsize": int(self._cache.maxsize),
+            }
+
+    @staticmethod
+    def _make_key(query_embedding: List[float], limit: int) -> Tuple[bytes, int]:
+        quantized = np.clip(
+            np.rint(np.asarray(query_embedding, dtype=np.float32) * 127), -128, 127
+        ).astype(np.int8)
+        return quantized.tobytes(), limit
@@ -0,0 +1,94 @@
+from video_vectorizer import VideoVectorizer
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+# 環境変数から設定を読み込み
+PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT_ID")
+LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION", "asia-northeast1")
+VECTOR_INDEX_ID = os.environ.get("VECTOR_INDEX_ID")
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 2000))
+EMBEDDING_CACHE_TTL = float(os.environ.get("EMBEDDING_CACHE_TTL", 300))
+# textembedding-gecko@001は1リクエストあたり5件までのテキストを受け付ける
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 5))
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 10000))
+RESULT_CACHE_THRESHOLD = float(os.environ.get("RESULT_CACHE_THRESHOLD", 0.97))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 120))
+ENABLE_SPEECH_TRANSCRIPTION = (
+    os.environ.get("ENABLE_SPEECH_TRANSCRIPTION", "true").lower() == "true"
+)
+ANALYSIS_CACHE_BUCKET = os.environ.get("ANALYSIS_CACHE_BUCKET")
+UPSERT_BATCH_SIZE = int(os.environ.get("UPSERT_BATCH_SIZE", 100))
+UPSERT_FLUSH_INTERVAL = float(os.environ.get("UPSERT_FLUSH_INTERVAL", 2))
+UPSERT_MAX_RETRIES = int(os.environ.get("UPSERT_MAX_RETRIES", 5))
+REDIS_URL = os.environ.get("REDIS_URL")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+
+
+def configure_logging() -> None:
+    """
+    ログの書き出しをバックグラウンドスレッドに任せるようにロガーを設定する
+    (リクエスト処理スレッドはキューへの追加のみを行う)
+    """
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(LOG_LEVEL)
+
+    def start_listener() -> None:
+        listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+        listener.start()
+        atexit.register(listener.stop)
+
+    def restart_listener_in_child() -> None:
+        # 親プロセスで未出力のログを重複して書き出さないよう、新しいキューを使う
+        queue_handler.queue = queue.SimpleQueue()
+        start_listener()
+
+    start_listener()
+
+    # スレッドはフォーク先に引き継がれないため、gunicornのワーカーでは作り直す
+    os.register_at_fork(after_in_child=restart_listener_in_child)
+
+
+def validate_settings() -> None:
+    """
+    必須の環境変数が設定されているかをチェックする
+    (初回リクエストや初回のジョブ登録より前に設定漏れを検出する)
+    """
+    if not all([PROJECT_ID, VECTOR_INDEX_ID, REDIS_URL]):
+        raise ValueError(
+            "Missing required environment variables. "
+            "Please set GOOGLE_CLOUD_PROJECT_ID, VECTOR_INDEX_ID and REDIS_URL."
+        )
+
+
+def create_vectorizer() -> VideoVectorizer:
+    """
+    環境変数の設定からVideoVectorizerのインスタンスを作成する
+    """
+    validate_settings()
+
+    return VideoVectorizer(
+        project_id=PROJECT_ID,
+        location=LOCATION,
+        vector_index_id=VECTOR_INDEX_ID,
+        embedding_cache_size=EMBEDDING_CACHE_SIZE,
+        embedding_cache_ttl=EMBEDDING_CACHE_TTL,
+        embedding_batch_size=EMBEDDING_BATCH_SIZE,
+        result_cache_size=RESULT_CACHE_SIZE,
+        result_cache_threshold=RESULT_CACHE_THRESHOLD,
+        result_cache_ttl=RESULT_CACHE_TTL,
+        enable_speech_transcription=ENABLE_SPEECH_TRANSCRIPTION,
+        analysis_cache_bucket=ANALYSIS_CACHE_BUCKET,
+        upsert_batch_size=UPSERT_BATCH_SIZE,
+        upsert_flush_interval=UPSERT_FLUSH_INTERVAL,
+        upsert_max_retries=UPSERT_MAX_RETRIES,
+    )
@@ -1,19 +1,49 @@
-from flask import Flask, request, jsonify
-from video_vectorizer import VideoVectorizer
+# gevent環境でソケットI/Oを協調的に切り替えるため、他のモジュールより先にパッチを適用する
+from gevent import monkey
+
+monkey.patch_all()
+
+# gRPC (google.cloud.*) の通信もgeventのイベントループ上で動作させる
+import grpc.experimental.gevent as grpc_gevent
+
+grpc_gevent.init_gevent()
+
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
+from celery.result import AsyncResult
+from config import configure_logging, create_vectorizer
+from models import ProcessVideoResult
+from pydantic import ValidationError
+from schemas import BatchSearchRequest, ProcessVideoRequest, SearchRequest
+from tasks import celery, enqueue_process_video
+import msgspec
+import orjson
 import os
 from typing import Dict, Any, Union
 
+
+class OrjsonProvider(JSONProvider):
+    """
+    orjsonを使用してJSONのシリアライズ・デシリアライズを行うプロバイダ
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+Compress(app)
 
-# 環境変数から設定を読み込み
-PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT_ID")
-LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION", "asia-northeast1")
-VECTOR_INDEX_ID = os.environ.get("VECTOR_INDEX_ID")
+# ログの設定
+configure_logging()
 
 # VideoVectorizerのインスタンスを作成
-vectorizer = VideoVectorizer(
-    project_id=PROJECT_ID, location=LOCATION, vector_index_id=VECTOR_INDEX_ID
-)
+vectorizer = create_vectorizer()
 
 
 def create_error_response(
@@ -25,18 +55,52 @@ def create_error_response(
     return jsonify({"error": message}), status_code
 
 
+def create_validation_error_response(
+    error: ValidationError,
+) -> tuple[Dict[str, Any], int]:
+    """
+    リクエストの検証エラーレスポンスを作成する
+    (不正なJSONの場合はリクエスト本文のbytesが入力値となりシリアライズできないため、
+    入力値はレスポンスに含めない)
+    """
+    return (
+        jsonify(
+            {
+                "error": "Invalid request parameters",
+                "details": error.errors(
+                    include_url=False, include_context=False, include_input=False
+                ),
+            }
+        ),
+        422,
+    )
+
+
+def include_metadata_requested() -> bool:
+    """
+    クエリパラメータ include=metadata が指定されているかを判定する
+    """
+    return "metadata" in request.args.get("include", "").split(",")
+
+
 @app.route("/health", methods=["GET"])
-def health_check() -> Dict[str, str]:
+def health_check() -> Union[Dict[str, str], tuple[Dict[str, str], int]]:
     """
     ヘルスチェックエンドポイント
+    (初回はVertex AIへの接続をウォームアップし、完了するまで503を返す)
     """
+    try:
+        vectorizer.warm_up()
+    except Exception as e:
+        return jsonify({"status": "warming_up", "error": str(e)}), 503
+
     return jsonify({"status": "healthy"})
 
 
 @app.route("/process-video", methods=["POST"])
-def process_video() -> Union[Dict[str, Any], tuple[Dict[str, str], int]]:
+def process_video() -> tuple[Dict[str, Any], int]:
     """
-    動画処理エンドポイント
+    動画処理エンドポイント (処理はバックグラウンドで実行し、ジョブIDを返す)
 
     Expected JSON payload:
     {
@@ -48,34 +112,49 @@ def process_video() -> Union[Dict[str, Any], tuple[Dict[str, str], int]]:
         if not request.is_json:
             return create_error_response("Content-Type must be application/json")
 
-        data = request.get_json()
+        # パラメータの検証
+        params = ProcessVideoRequest.model_validate_json(request.get_data())
+
+        # 動画の処理をバックグラウンドジョブとして登録
+        # (同じ動画の処理が未完了の場合は、そのジョブIDを返す)
+        job_id, _ = enqueue_process_video(params.gcsUri, params.videoId)
+
+        return jsonify({"status": "accepted", "job_id": job_id}), 202
+
+    except ValidationError as e:
+        return create_validation_error_response(e)
+
+    except Exception as e:
+        return create_error_response(f"Unexpected error: {str(e)}", 500)
 
-        # 必須パラメータのチェック
-        if not data or "gcsUri" not in data or "videoId" not in data:
-            return create_error_response(
-                "Missing required parameters. 'gcsUri' and 'videoId' are required."
-            )
 
-        # パラメータの取り出し
-        gcs_uri = data["gcsUri"]
-        video_id = data["videoId"]
+@app.route("/process-video/<job_id>", methods=["GET"])
+def get_process_video_job(
+    job_id: str,
+) -> Union[Response, tuple[Dict[str, str], int]]:
+    """
+    動画処理ジョブの状態確認エンドポイント
+    """
+    try:
+        task = AsyncResult(job_id, app=celery)
 
-        # URIの形式チェック
-        if not gcs_uri.startswith("gs://"):
-            return create_error_response(
-                "Invalid gcsUri format. Must start with 'gs://'"
-            )
+        if task.state == "FAILURE":
+            return create_error_response(f"Error processing video: {task.result}", 500)
 
-        # 動画の処理
-        result = vectorizer.process_video(gcs_uri, video_id)
+        if task.state != "SUCCESS":
+            # PENDING / STARTED / RETRY
+            return jsonify({"status": task.state.lower(), "job_id": job_id})
 
         # エラーチェック
-        if result.get("status") == "error":
-            return create_error_response(
-                f"Error processing video: {result.get('error')}", 500
-            )
+        result = msgspec.json.decode(task.result, type=ProcessVideoResult)
+        if result.status == "error":
+            return create_error_response(f"Error processing video: {result.error}", 500)
 
-        return jsonify(result)
+        # メタデータ (文字起こし全文など) を含むためmsgspecで直接エンコードする
+        body = msgspec.json.encode(
+            {"status": "success", "job_id": job_id, "result": result}
+        )
+        return Response(body, mimetype="application/json")
 
     except Exception as e:
         return create_error_response(f"Unexpected error: {str(e)}", 500)
@@ -91,31 +170,88 @@ def search_videos() -> Union[Dict[str, Any], tuple[Dict[str, str], int]]:
         "query": "検索クエリ",
         "limit": 5  # オプション、デフォルト5
     }
+
+    Query parameters:
+        include=metadata  # オプション、結果にメタデータを含める
     """
     try:
         if not request.is_json:
             return create_error_response("Content-Type must be application/json")
 
-        data = request.get_json()
+        # パラメータの検証
+        params = SearchRequest.model_validate_json(request.get_data())
 
-        # 必須パラメータのチェック
-        if not data or "query" not in data:
-            return create_error_response("Missing required parameter: 'query'")
+        # 検索の実行
+        query_embedding = vectorizer.generate_embeddings(params.query)
+        results = vectorizer.search_videos(
+            query_embedding,
+            params.limit,
+            include_metadata=include_metadata_requested(),
+        )
 
-        # パラメータの取り出し
-        query = data["query"]
-        limit = data.get("limit", 5)  # デフォルト値は5
+        return jsonify({"status": "success", "query": params.query, "results": results})
 
-        # 検索の実行
-        query_embedding = vectorizer.generate_embeddings(query)
-        results = vectorizer.search_videos(query_embedding, limit)
+    except ValidationError as e:
+        return create_validation_error_response(e)
+
+    except Exception as e:
+        return create_error_response(f"Unexpected error: {str(e)}", 500)
+
+
+@app.route("/search/batch", methods=["POST"])
+def search_videos_batch() -> Union[Dict[str, Any], tuple[Dict[str, str], int]]:
+    """
+    複数クエリの一括動画検索エンドポイント
+
+    Expected JSON payload:
+    {
+        "queries": ["検索クエリ1", "検索クエリ2"],
+        "limit": 5  # オプション、デフォルト5
+    }
+
+    Query parameters:
+        include=metadata  # オプション、結果にメタデータを含める
+    """
+    try:
+        if not request.is_json:
+            return create_error_response("Content-Type must be application/json")
+
+        # パラメータの検証
+        params = BatchSearchRequest.model_validate_json(request.get_data())
+
+        # 検索の実行 (埋め込み生成・検索ともに1回のAPI呼び出しにまとめる)
+        query_embeddings = vectorizer.generate_embeddings_batch(params.queries)
+        results = vectorizer.search_videos_batch(
+            query_embeddings,
+            params.limit,
+            include_metadata=include_metadata_requested(),
+        )
+
+        return jsonify(
+            {
+                "status": "success",
+                "results": [
+                    {"query": query, "results": query_results}
+                    for query, query_results in zip(params.queries, results)
+                ],
+            }
+        )
 
-        return jsonify({"status": "success", "query": query, "results": results})
+    except ValidationError as e:
+        return create_validation_error_response(e)
 
     except Exception as e:
         return create_error_response(f"Unexpected error: {str(e)}", 500)
 
 
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats() -> Dict[str, Any]:
+    """
+    キャッシュの統計情報エンドポイント
+    """
+    return jsonify({"status": "success", **vectorizer.cache_stats()})
+
+
 @app.errorhandler(404)
 def not_found(e) -> tuple[Dict[str, str], int]:
     """
@@ -133,13 +269,6 @@ def method_not_allowed(e) -> tuple[Dict[str, str], int]:
 
 
 if __name__ == "__main__":
-    # 環境変数のチェック
-    if not all([PROJECT_ID, VECTOR_INDEX_ID]):
-        raise ValueError(
-            "Missing required environment variables. "
-            "Please set GOOGLE_CLOUD_PROJECT_ID and VECTOR_INDEX_ID."
-        )
-
     # サーバーの起動
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,53 @@
+from msgspec import Struct
+from typing import List, Optional
+
+
+class Label(Struct):
+    """
+    動画から検出されたラベル
+    """
+
+    description: str
+    confidence: float
+
+
+class Scene(Struct):
+    """
+    動画のシーン (ショット) の区間 (秒)
+    """
+
+    start_time: float
+    end_time: float
+
+
+class VideoData(Struct):
+    """
+    動画の分析結果
+    """
+
+    labels: List[Label]
+    scenes: List[Scene]
+    transcript: str
+
+
+class VideoMetadata(Struct):
+    """
+    ベクトルデータと共にインデックスに保存するメタデータ
+    """
+
+    video_id: str
+    gcs_uri: str
+    labels: List[Label]
+    scenes: List[Scene]
+    transcript: str
+
+
+class ProcessVideoResult(Struct, omit_defaults=True):
+    """
+    動画処理の結果
+    """
+
+    status: str
+    video_id: str
+    metadata: Optional[VideoMetadata] = None
+    error: Optional[str] = None
@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List
+
+# 1回の検索で返す結果の最大数
+MAX_SEARCH_LIMIT = 100
+# 一括検索で受け付けるクエリの最大数
+MAX_BATCH_QUERIES = 100
+
+
+class ProcessVideoRequest(BaseModel):
+    """
+    動画処理リクエスト
+    """
+
+    gcsUri: str
+    videoId: str = Field(min_length=1)
+
+    @field_validator("gcsUri")
+    @classmethod
+    def validate_gcs_uri(cls, value: str) -> str:
+        if not value.startswith("gs://"):
+            raise ValueError("Invalid gcsUri format. Must start with 'gs://'")
+        return value
+
+
+class SearchRequest(BaseModel):
+    """
+    動画検索リクエスト
+    """
+
+    query: str
+    limit: int = Field(default=5, ge=1, le=MAX_SEARCH_LIMIT)
+
+
+class BatchSearchRequest(BaseModel):
+    """
+    複数クエリの一括動画検索リクエスト
+    """
+
+    queries: List[str] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+    limit: int = Field(default=5, ge=1, le=MAX_SEARCH_LIMIT)
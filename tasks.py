@@ -0,0 +1,117 @@
+from celery import Celery
+from celery.signals import worker_process_shutdown
+from config import REDIS_URL, create_vectorizer, validate_settings
+from video_vectorizer import VideoVectorizer
+from typing import Optional, Tuple
+import hashlib
+import logging
+import msgspec
+import redis
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# REDIS_URLが未設定のままワーカーやWebアプリを起動しないよう、先にチェックする
+validate_settings()
+
+celery = Celery("video_vectorizer", broker=REDIS_URL, backend=REDIS_URL)
+celery.conf.update(
+    task_track_started=True,
+    result_expires=24 * 60 * 60,  # 結果は1日保持
+)
+
+# 処理中のジョブIDを保持するキーの有効期限 (ワーカーが異常終了した場合の保険)
+PROCESSING_KEY_TTL = 60 * 60
+
+# 処理中のジョブの登録・確認に使用するRedisクライアント
+redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+# ワーカープロセスごとに1つのVideoVectorizerを使い回す
+_vectorizer: Optional[VideoVectorizer] = None
+
+
+def get_vectorizer() -> VideoVectorizer:
+    """
+    ワーカープロセスのVideoVectorizerを取得する
+    """
+    global _vectorizer
+    if _vectorizer is None:
+        _vectorizer = create_vectorizer()
+    return _vectorizer
+
+
+@worker_process_shutdown.connect
+def flush_pending_vectors(**kwargs) -> None:
+    """
+    ワーカープロセスの終了時に保存待ちのベクトルをインデックスに保存する
+    (preforkの子プロセスはos._exitで終了するため、atexitの処理は実行されない)
+    """
+    if _vectorizer is None:
+        return
+
+    try:
+        _vectorizer.flush()
+    except Exception:
+        logger.exception("Error upserting vectors on worker shutdown")
+
+
+def _processing_key(gcs_uri: str, video_id: str) -> str:
+    """
+    処理中のジョブIDを保持するRedisのキーを作成する
+    (同じ動画IDでもURIが異なる場合は別のジョブとして扱う)
+    """
+    uri_hash = hashlib.sha256(gcs_uri.encode()).hexdigest()
+    return f"process_video:{video_id}:{uri_hash}"
+
+
+def enqueue_process_video(gcs_uri: str, video_id: str) -> Tuple[str, bool]:
+    """
+    動画処理ジョブを登録する
+    (同じ動画の処理が登録済みで未完了の場合は、新たに登録せずそのジョブIDを返す)
+    Args:
+        gcs_uri: Cloud Storage上の動画のURI
+        video_id: 動画の一意識別子
+    Returns:
+        Tuple[str, bool]: (ジョブID, 新たに登録したかどうか)
+    """
+    key = _processing_key(gcs_uri, video_id)
+    job_id = str(uuid.uuid4())
+
+    # 確認までの間に既存のジョブが完了した場合は登録し直す
+    while not redis_client.set(key, job_id, nx=True, ex=PROCESSING_KEY_TTL):
+        existing_job_id = redis_client.get(key)
+        if existing_job_id is not None:
+            logger.info(
+                "Video %s is already queued as job %s", video_id, existing_job_id
+            )
+            return existing_job_id, False
+
+    try:
+        process_video_task.apply_async(args=(gcs_uri, video_id), task_id=job_id)
+    except Exception:
+        redis_client.delete(key)
+        raise
+
+    return job_id, True
+
+
+@celery.task(bind=True, name="process_video")
+def process_video_task(self, gcs_uri: str, video_id: str) -> str:
+    """
+    動画処理をバックグラウンドで実行するタスク
+    Args:
+        gcs_uri: Cloud Storage上の動画のURI
+        video_id: 動画の一意識別子
+    Returns:
+        str: JSONにエンコードした処理結果 (ProcessVideoResult)
+    """
+    logger.info("Job %s: processing video %s", self.request.id, video_id)
+    try:
+        result = get_vectorizer().process_video(gcs_uri, video_id)
+    finally:
+        # 完了後に同じ動画が登録された場合は、新しいジョブとして処理する
+        key = _processing_key(gcs_uri, video_id)
+        if redis_client.get(key) == self.request.id:
+            redis_client.delete(key)
+
+    return msgspec.json.encode(result).decode()
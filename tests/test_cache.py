@@ -0,0 +1,181 @@
+import time
+
+import pytest
+
+import cache
+from cache import EmbeddingCache, QuantizedResultCache, SemanticResultCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+def unit(index: int, dim: int = 4) -> list:
+    vector = [0.0] * dim
+    vector[index] = 1.0
+    return vector
+
+
+class TestEmbeddingCache:
+    def test_get_returns_stored_vector(self) -> None:
+        embeddings = EmbeddingCache()
+        embeddings.set("text", [0.1, 0.2])
+
+        assert embeddings.get("text") == [0.1, 0.2]
+        assert embeddings.get("other") is None
+        assert embeddings.stats()["hits"] == 1
+        assert embeddings.stats()["misses"] == 1
+
+    def test_expired_entry_is_evicted(self, clock: FakeClock) -> None:
+        embeddings = EmbeddingCache(ttl=10)
+        embeddings.set("text", [0.1])
+
+        clock.advance(10)
+        assert embeddings.get("text") == [0.1]
+
+        clock.advance(1)
+        assert embeddings.get("text") is None
+        assert embeddings.stats()["evictions"] == 1
+        assert embeddings.stats()["size"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        embeddings = EmbeddingCache(maxsize=2)
+        embeddings.set("a", [1.0])
+        embeddings.set("b", [2.0])
+        embeddings.get("a")
+        embeddings.set("c", [3.0])
+
+        assert embeddings.get("b") is None
+        assert embeddings.get("a") == [1.0]
+        assert embeddings.get("c") == [3.0]
+
+    def test_invalidate_removes_only_owned_entries(self) -> None:
+        embeddings = EmbeddingCache()
+        embeddings.set("a", [1.0], owner="video-1")
+        embeddings.set("b", [2.0], owner="video-1")
+        embeddings.set("c", [3.0], owner="video-2")
+        embeddings.set("d", [4.0])
+
+        assert embeddings.invalidate("video-1") == 2
+        assert embeddings.get("a") is None
+        assert embeddings.get("b") is None
+        assert embeddings.get("c") == [3.0]
+        assert embeddings.get("d") == [4.0]
+        assert embeddings.invalidate("video-1") == 0
+
+    def test_overwrite_moves_entry_to_new_owner(self) -> None:
+        embeddings = EmbeddingCache()
+        embeddings.set("a", [1.0], owner="video-1")
+        embeddings.set("a", [2.0], owner="video-2")
+
+        assert embeddings.invalidate("video-1") == 0
+        assert embeddings.get("a") == [2.0]
+
+
+class TestSemanticResultCache:
+    def test_empty_cache_misses(self) -> None:
+        results = SemanticResultCache(dim=4)
+
+        assert results.get(unit(0), 5) is None
+        assert results.stats()["misses"] == 1
+
+    def test_similar_query_hits_and_dissimilar_query_misses(self) -> None:
+        results = SemanticResultCache(dim=4, threshold=0.97)
+        results.set(unit(0), 5, [{"video_id": "a", "score": 0.1}])
+
+        assert results.get([1.0, 0.05, 0.0, 0.0], 5) == [
+            {"video_id": "a", "score": 0.1}
+        ]
+        assert results.get([1.0, 1.0, 0.0, 0.0], 5) is None
+
+    def test_limit_check(self) -> None:
+        cached = [{"video_id": str(i), "score": 0.0} for i in range(5)]
+        results = SemanticResultCache(dim=4)
+        results.set(unit(0), 5, cached)
+
+        assert results.get(unit(0), 3) == cached[:3]
+        assert results.get(unit(0), 10) is None
+
+    def test_oldest_entry_is_replaced_when_full(self) -> None:
+        results = SemanticResultCache(dim=4, max_elements=2)
+        for i in range(4):
+            results.set(unit(i), 5, [{"video_id": str(i), "score": 0.0}])
+
+        assert results.get(unit(0), 5) is None
+        assert results.get(unit(1), 5) is None
+        assert results.get(unit(2), 5) == [{"video_id": "2", "score": 0.0}]
+        assert results.get(unit(3), 5) == [{"video_id": "3", "score": 0.0}]
+        assert results.stats()["size"] == 2
+
+    def test_expired_entries_are_removed(self, clock: FakeClock) -> None:
+        results = SemanticResultCache(dim=4, ttl=10)
+        results.set(unit(0), 5, [{"video_id": "a", "score": 0.0}])
+        clock.advance(5)
+        results.set(unit(1), 5, [{"video_id": "b", "score": 0.0}])
+
+        clock.advance(6)
+        assert results.get(unit(0), 5) is None
+        assert results.get(unit(1), 5) == [{"video_id": "b", "score": 0.0}]
+        assert results.stats()["size"] == 1
+
+        clock.advance(5)
+        assert results.get(unit(1), 5) is None
+        assert results.stats()["size"] == 0
+
+    def test_invalidate_clears_all_entries(self) -> None:
+        results = SemanticResultCache(dim=4)
+        results.set(unit(0), 5, [])
+        results.invalidate()
+
+        assert results.get(unit(0), 5) is None
+        assert results.stats()["generation"] == 1
+
+        results.set(unit(0), 5, [{"video_id": "a", "score": 0.0}])
+        assert results.get(unit(0), 5) == [{"video_id": "a", "score": 0.0}]
+
+
+class TestQuantizedResultCache:
+    def test_same_quantized_query_hits(self) -> None:
+        results = QuantizedResultCache()
+        results.set([0.5, -0.25], 5, [{"video_id": "a", "score": 0.1}])
+
+        # int8への量子化で同じ値に丸められる差は同一のクエリとして扱う
+        assert results.get([0.501, -0.251], 5) == [{"video_id": "a", "score": 0.1}]
+        assert results.get([0.6, -0.25], 5) is None
+        assert results.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 10000}
+
+    def test_limit_is_part_of_key(self) -> None:
+        results = QuantizedResultCache()
+        results.set([0.5], 5, [])
+
+        assert results.get([0.5], 5) == []
+        assert results.get([0.5], 3) is None
+
+    def test_expired_entry_misses(self) -> None:
+        results = QuantizedResultCache(ttl=0.05)
+        results.set([0.5], 5, [])
+
+        time.sleep(0.1)
+        assert results.get([0.5], 5) is None
+
+    def test_invalidate_clears_all_entries(self) -> None:
+        results = QuantizedResultCache()
+        results.set([0.5], 5, [])
+        results.invalidate()
+
+        assert results.get([0.5], 5) is None
+        assert results.stats()["size"] == 0
@@ -0,0 +1,37 @@
+import importlib
+import logging
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client():
+    for module in ["gevent", "celery", "redis", "google.cloud.aiplatform"]:
+        pytest.importorskip(module)
+
+    import google.auth
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("GOOGLE_CLOUD_PROJECT_ID", "test-project")
+        monkeypatch.setenv("VECTOR_INDEX_ID", "test-index")
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+        monkeypatch.setattr(google.auth, "default", lambda **kwargs: (None, None))
+        # main.configure_logging()が置き換えるルートロガーのハンドラを元に戻す
+        monkeypatch.setattr(
+            logging.getLogger(), "handlers", logging.getLogger().handlers
+        )
+        main = importlib.import_module("main")
+
+    return main.app.test_client()
+
+
+@pytest.mark.parametrize("path", ["/process-video", "/search", "/search/batch"])
+@pytest.mark.parametrize("body", ["{bad", ""])
+def test_invalid_json_returns_validation_error(client, path: str, body: str) -> None:
+    response = client.post(path, data=body, content_type="application/json")
+
+    assert response.status_code == 422
+    payload = response.get_json()
+    assert payload["error"] == "Invalid request parameters"
+    assert payload["details"][0]["type"] == "json_invalid"
+    assert "input" not in payload["details"][0]
@@ -0,0 +1,125 @@
+import os
+
+import pytest
+
+
+class FakeIndex:
+    def __init__(self) -> None:
+        self.calls = []
+        self.errors = []
+        self.on_upsert = None
+
+    def upsert_embeddings(self, embeddings, ids, parameters) -> None:
+        if self.on_upsert is not None:
+            self.on_upsert()
+        if self.errors:
+            raise self.errors.pop(0)
+        self.calls.append(dict(zip(ids, embeddings)))
+
+
+@pytest.fixture
+def vectorizer(monkeypatch: pytest.MonkeyPatch):
+    for module in [
+        "google.cloud.aiplatform",
+        "google.cloud.storage",
+        "google.cloud.videointelligence_v1",
+    ]:
+        pytest.importorskip(module)
+
+    import google.auth
+    from google.cloud import aiplatform
+
+    from video_vectorizer import VideoVectorizer
+
+    monkeypatch.setattr(google.auth, "default", lambda **kwargs: (None, None))
+    monkeypatch.setattr(aiplatform, "init", lambda **kwargs: None)
+
+    instance = VideoVectorizer(
+        project_id="test-project",
+        location="asia-northeast1",
+        vector_index_id="test-index",
+        upsert_batch_size=2,
+        upsert_flush_interval=60,
+        upsert_max_retries=1,
+    )
+    instance._clients_pid = os.getpid()
+    instance._clients["index"] = FakeIndex()
+    yield instance
+
+    with instance._upsert_lock:
+        instance._pending_upserts.clear()
+        if instance._flush_timer is not None:
+            instance._flush_timer.cancel()
+
+
+def metadata(video_id: str):
+    from models import VideoMetadata
+
+    return VideoMetadata(
+        video_id=video_id,
+        gcs_uri=f"gs://bucket/{video_id}.mp4",
+        labels=[],
+        scenes=[],
+        transcript="",
+    )
+
+
+def test_failed_upsert_is_requeued(vectorizer) -> None:
+    index = vectorizer.index
+    index.errors.append(RuntimeError("unavailable"))
+
+    # バッチの上限に達した保存が失敗しても、呼び出し元には例外を伝えない
+    vectorizer.store_vectors([0.1], metadata("a"))
+    vectorizer.store_vectors([0.2], metadata("b"))
+
+    assert index.calls == []
+    assert set(vectorizer._pending_upserts) == {"a", "b"}
+    assert vectorizer._flush_timer is not None
+
+    assert vectorizer.flush() == 2
+    assert index.calls == [{"a": [0.1], "b": [0.2]}]
+    assert vectorizer._pending_upserts == {}
+
+
+def test_newer_vector_wins_over_requeued_one(vectorizer) -> None:
+    index = vectorizer.index
+    vectorizer.store_vectors([0.1], metadata("a"))
+
+    def store_newer_vector() -> None:
+        index.on_upsert = None
+        vectorizer.store_vectors([0.9], metadata("a"))
+
+    index.on_upsert = store_newer_vector
+    index.errors.append(RuntimeError("unavailable"))
+    assert vectorizer.flush() == 0
+
+    assert vectorizer.flush() == 1
+    assert index.calls == [{"a": [0.9]}]
+
+
+def test_vectors_are_dropped_after_max_retries(vectorizer) -> None:
+    index = vectorizer.index
+    index.errors.extend([RuntimeError("unavailable")] * 2)
+    vectorizer.store_vectors([0.1], metadata("a"))
+
+    assert vectorizer.flush() == 0
+    assert set(vectorizer._pending_upserts) == {"a"}
+
+    assert vectorizer.flush() == 0
+    assert vectorizer._pending_upserts == {}
+
+    vectorizer.store_vectors([0.2], metadata("b"))
+    assert vectorizer.flush() == 1
+    assert index.calls == [{"b": [0.2]}]
+
+
+def test_batch_does_not_flush_while_retry_is_pending(vectorizer) -> None:
+    index = vectorizer.index
+    index.errors.append(RuntimeError("unavailable"))
+    vectorizer.store_vectors([0.1], metadata("a"))
+    assert vectorizer.flush() == 0
+
+    vectorizer.store_vectors([0.2], metadata("b"))
+
+    assert index.calls == []
+    assert set(vectorizer._pending_upserts) == {"a", "b"}
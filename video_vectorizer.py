@@ -2,190 +2,726 @@ from google.cloud import videointelligence_v1
 from google.cloud import storage
 from google.cloud import aiplatform
 from google.cloud.aiplatform import matching_engine
-import json
+from google.api_core.exceptions import NotFound
+import google.auth
+import google.auth.transport.requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import atexit
+import hashlib
+import logging
 import os
-from typing import Dict, List, Any, Optional
+import sys
+import threading
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from cache import EmbeddingCache, QuantizedResultCache, SemanticResultCache
+from models import Label, ProcessVideoResult, Scene, VideoData, VideoMetadata
+import msgspec
+
+logger = logging.getLogger(__name__)
+
+# textembedding-gecko@001 の出力次元数
+EMBEDDING_DIMENSION = 768
+
+# 長時間の動画分析中も接続を維持するためのgRPCチャネル設定
+GRPC_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+]
 
 
 class VideoVectorizer:
-    def __init__(self, project_id: str, location: str, vector_index_id: str):
+    def __init__(
+        self,
+        project_id: str,
+        location: str,
+        vector_index_id: str,
+        embedding_cache_size: int = 2000,
+        embedding_cache_ttl: float = 300.0,
+        embedding_batch_size: int = 5,
+        result_cache_size: int = 10000,
+        result_cache_threshold: float = 0.97,
+        result_cache_ttl: float = 120.0,
+        enable_speech_transcription: bool = True,
+        analysis_cache_bucket: Optional[str] = None,
+        upsert_batch_size: int = 100,
+        upsert_flush_interval: float = 2.0,
+        upsert_max_retries: int = 5,
+    ):
         """
         VideoVectorizerの初期化
         Args:
             project_id: Google Cloudプロジェクトのプロジェクトコード
             location: リージョン (例: asia-northeast1)
             vector_index_id: Vertex AI Vector Searchのインデックスコード
+            embedding_cache_size: 埋め込みキャッシュの最大エントリ数
+            embedding_cache_ttl: 埋め込みキャッシュの有効期限 (秒)
+            embedding_batch_size: 1回のAPI呼び出しで埋め込むテキストの最大数
+            result_cache_size: 検索結果キャッシュの最大エントリ数
+            result_cache_threshold: 検索結果を再利用するクエリのコサイン類似度の下限
+            result_cache_ttl: 検索結果キャッシュの有効期限 (秒)
+            enable_speech_transcription: 音声テキストの抽出を行うかどうか
+            analysis_cache_bucket: 動画分析結果をキャッシュするCloud Storageバケット
+            upsert_batch_size: まとめてインデックスに保存するベクトルの件数
+            upsert_flush_interval: 保存待ちのベクトルをインデックスに保存する間隔 (秒)
+            upsert_max_retries: インデックスへの保存に失敗した場合の再試行回数の上限
         """
         self.project_id = project_id
         self.location = location
         self.vector_index_id = vector_index_id
+        self.embedding_batch_size = embedding_batch_size
+        self.enable_speech_transcription = enable_speech_transcription
+        self.analysis_cache_bucket = analysis_cache_bucket
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_flush_interval = upsert_flush_interval
+        self.upsert_max_retries = upsert_max_retries
 
-        # クライアントの初期化
-        self.video_client = videointelligence_v1.VideoIntelligenceServiceClient()
-        self.storage_client = storage.Client()
+        # 認証情報は一度だけ取得し、全てのクライアントで共有する
+        # (aiplatform.initに渡さない場合、参照するたびに新しい認証情報が作成される)
+        self._credentials, _ = google.auth.default(
+            scopes=["https://www.googleapis.com/auth/cloud-platform"]
+        )
 
         # Vertex AIの初期化
-        aiplatform.init(project=project_id, location=location)
+        aiplatform.init(
+            project=project_id, location=location, credentials=self._credentials
+        )
+
+        # クライアントの初期化
+        # (gRPCチャネルはフォークをまたいで共有できないため、プロセスごとに
+        # 初回アクセス時に作成する)
+        self._clients: Dict[str, Any] = {}
+        self._clients_pid: Optional[int] = None
+        self._client_lock = threading.Lock()
+        self._warmed_up = threading.Event()
+        self._warm_up_lock = threading.Lock()
+
+        # インデックスへの保存待ちのベクトル (動画ID -> (ベクトル, メタデータ))
+        self._pending_upserts: Dict[str, Tuple[List[float], VideoMetadata]] = {}
+        self._upsert_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        # 連続して保存に失敗した回数 (再試行の間隔と上限の判定に使用)
+        self._upsert_failures = 0
+        # (Celeryのpreforkの子プロセスではatexitが呼ばれないため、
+        # tasks.pyのworker_process_shutdownでも保存する)
+        atexit.register(self.flush)
+
+        # 埋め込みキャッシュの初期化
+        self._embedding_cache = EmbeddingCache(
+            maxsize=embedding_cache_size, ttl=embedding_cache_ttl
+        )
+
+        # 検索結果キャッシュの初期化
+        # (量子化したクエリの完全一致 -> 類似クエリの順に参照する)
+        self._quantized_result_cache = QuantizedResultCache(
+            maxsize=result_cache_size, ttl=result_cache_ttl
+        )
+        self._result_cache = SemanticResultCache(
+            dim=EMBEDDING_DIMENSION,
+            max_elements=result_cache_size,
+            threshold=result_cache_threshold,
+            ttl=result_cache_ttl,
+        )
+
+    @property
+    def video_client(self) -> videointelligence_v1.VideoIntelligenceServiceClient:
+        """
+        Video Intelligence APIのクライアント
+        """
+        return self._get_client("video", self._create_video_client)
+
+    @property
+    def storage_client(self) -> storage.Client:
+        """
+        Cloud Storageのクライアント
+        """
+        return self._get_client(
+            "storage",
+            lambda: storage.Client(
+                project=self.project_id, credentials=self._credentials
+            ),
+        )
+
+    @property
+    def index(self) -> matching_engine.MatchingEngineIndex:
+        """
+        Vertex AI Vector Searchのインデックス
+        """
+        return self._get_client(
+            "index",
+            lambda: matching_engine.MatchingEngineIndex(
+                index_name=self.vector_index_id,
+                project=self.project_id,
+                location=self.location,
+            ),
+        )
+
+    @property
+    def embedding_model(self) -> Any:
+        """
+        テキスト埋め込みモデル
+        """
+        return self._get_client(
+            "embedding_model",
+            lambda: aiplatform.TextEmbeddingModel.from_pretrained(
+                "textembedding-gecko@001"
+            ),
+        )
+
+    def _get_client(self, name: str, factory: Callable[[], Any]) -> Any:
+        """
+        現在のプロセス用のクライアントを取得 (未作成、またはフォーク後の場合は作成する)
+        Args:
+            name: クライアントの名前
+            factory: クライアントを作成する関数
+        Returns:
+            Any: クライアント
+        """
+        pid = os.getpid()
+        client = self._clients.get(name) if self._clients_pid == pid else None
+        if client is not None:
+            return client
+
+        with self._client_lock:
+            if self._clients_pid != pid:
+                # 親プロセスから引き継いだクライアントは使わずに作り直す
+                self._clients = {}
+                self._clients_pid = pid
 
-        # Vector Searchインデックスの初期化
-        self.index = matching_engine.MatchingEngineIndex(
-            index_name=vector_index_id, project=project_id, location=location
+            client = self._clients.get(name)
+            if client is None:
+                client = factory()
+                self._clients[name] = client
+            return client
+
+    def _create_video_client(
+        self,
+    ) -> videointelligence_v1.VideoIntelligenceServiceClient:
+        """
+        keepaliveを設定したgRPCチャネルでVideo Intelligence APIのクライアントを作成
+        """
+        transport_class = (
+            videointelligence_v1.VideoIntelligenceServiceClient.get_transport_class(
+                "grpc"
+            )
+        )
+        channel = transport_class.create_channel(
+            credentials=self._credentials, options=GRPC_CHANNEL_OPTIONS
         )
+        return videointelligence_v1.VideoIntelligenceServiceClient(
+            transport=transport_class(channel=channel)
+        )
+
+    def warm_up(self) -> None:
+        """
+        認証トークンの取得、インデックスの読み込み、埋め込みモデルの呼び出しを
+        プロセスごとに一度だけ行い、初回リクエストでのコールドスタートを防ぐ
+        """
+        if self._warmed_up.is_set():
+            return
 
-    def analyze_video(self, gcs_uri: str) -> Dict[str, Any]:
+        with self._warm_up_lock:
+            if self._warmed_up.is_set():
+                return
+
+            # 全てのクライアントが共有する認証情報のトークンを取得しておく
+            self._credentials.refresh(google.auth.transport.requests.Request())
+            # インデックスのリソース情報を取得しておく (初回の検索時の読み込みを避ける)
+            _ = self.index
+            self.embedding_model.get_embeddings(["warmup"])
+            self._warmed_up.set()
+
+    def analyze_video(self, gcs_uri: str) -> VideoData:
         """
         動画を分析し、ラベル、シーン、音声テキストを抽出
         Args:
             gcs_uri: Cloud Storage上の動画のURI (gs://bucket-name/video.mp4)
         Returns:
-            Dict: 分析結果を含む辞書
+            VideoData: 分析結果
         """
-        features = [
-            videointelligence_v1.Feature.LABEL_DETECTION,
-            videointelligence_v1.Feature.SHOT_CHANGE_DETECTION,
-            videointelligence_v1.Feature.SPEECH_TRANSCRIPTION,
+        logger.info("Processing video analysis for %s", gcs_uri)
+
+        if not self.enable_speech_transcription:
+            # 音声認識を行わない場合は1回のリクエストにまとめる
+            annotation_results = [
+                self._annotate_video(
+                    gcs_uri,
+                    [
+                        videointelligence_v1.Feature.LABEL_DETECTION,
+                        videointelligence_v1.Feature.SHOT_CHANGE_DETECTION,
+                    ],
+                )
+            ]
+            return self._parse_video_analysis(annotation_results)
+
+        # 機能ごとに別リクエストとして並列に実行
+        feature_groups = [
+            [videointelligence_v1.Feature.LABEL_DETECTION],
+            [videointelligence_v1.Feature.SHOT_CHANGE_DETECTION],
+            [videointelligence_v1.Feature.SPEECH_TRANSCRIPTION],
         ]
+        executor = ThreadPoolExecutor(max_workers=len(feature_groups))
+        try:
+            futures = [
+                executor.submit(self._annotate_video, gcs_uri, features)
+                for features in feature_groups
+            ]
+            annotation_results = [future.result() for future in as_completed(futures)]
+        finally:
+            # いずれかの分析が失敗した場合に、残りの分析の完了 (最大10分) を待たない
+            executor.shutdown(wait=False, cancel_futures=True)
 
-        config = videointelligence_v1.SpeechTranscriptionConfig(
-            language_code="ja-JP",
-            enable_automatic_punctuation=True,
-        )
+        return self._parse_video_analysis(annotation_results)
 
-        video_context = videointelligence_v1.VideoContext(
-            speech_transcription_config=config
-        )
+    def analyze_video_cached(self, gcs_uri: str) -> VideoData:
+        """
+        Cloud Storageにキャッシュした分析結果があれば再利用し、なければ動画を分析する
+        Args:
+            gcs_uri: Cloud Storage上の動画のURI
+        Returns:
+            VideoData: 分析結果
+        """
+        cache_blob = self._get_analysis_cache_blob(gcs_uri)
+        if cache_blob is not None:
+            try:
+                video_data = msgspec.json.decode(
+                    cache_blob.download_as_bytes(), type=VideoData
+                )
+                logger.info("Using cached video analysis for %s", gcs_uri)
+                return video_data
+            except NotFound:
+                pass
+            except msgspec.DecodeError:
+                # 壊れた、または形式の古いキャッシュは分析し直して上書きする
+                logger.warning("Ignoring invalid cached video analysis for %s", gcs_uri)
+            except Exception:
+                # キャッシュを読めない場合も動画の分析は続ける
+                logger.warning(
+                    "Failed to read cached video analysis for %s",
+                    gcs_uri,
+                    exc_info=True,
+                )
+
+        video_data = self.analyze_video(gcs_uri)
+
+        if cache_blob is not None:
+            try:
+                cache_blob.upload_from_string(
+                    msgspec.json.encode(video_data),
+                    content_type="application/json",
+                )
+            except Exception:
+                # 分析は完了しているため、キャッシュの保存に失敗しても処理は失敗させない
+                logger.warning(
+                    "Failed to cache video analysis for %s", gcs_uri, exc_info=True
+                )
+
+        return video_data
+
+    def _get_analysis_cache_blob(self, gcs_uri: str) -> Optional[storage.Blob]:
+        """
+        分析結果のキャッシュを保存するBlobを取得
+        (動画が上書きされた場合に古い結果を使わないよう、世代番号をキーに含める)
+        Args:
+            gcs_uri: Cloud Storage上の動画のURI
+        Returns:
+            Optional[storage.Blob]: キャッシュ用のBlob、キャッシュが無効な場合はNone
+        """
+        if not self.analysis_cache_bucket:
+            return None
+
+        video_blob = storage.Blob.from_string(gcs_uri, client=self.storage_client)
+        video_blob.reload()
 
-        operation = self.video_client.annotate_video(
-            request={
-                "features": features,
-                "input_uri": gcs_uri,
-                "video_context": video_context,
-            }
+        key = hashlib.sha256(
+            f"{gcs_uri}#{video_blob.generation}#{self.enable_speech_transcription}".encode()
+        ).hexdigest()
+        return self.storage_client.bucket(self.analysis_cache_bucket).blob(
+            f"analysis/{key}.json"
         )
 
-        print(f"Processing video analysis for {gcs_uri}...")
+    def _annotate_video(self, gcs_uri: str, features: List[Any]) -> Any:
+        """
+        指定した機能で動画分析を実行し、完了を待つ
+        Args:
+            gcs_uri: Cloud Storage上の動画のURI
+            features: 実行するVideo Intelligence APIの機能
+        Returns:
+            Any: 動画1本分の分析結果 (annotation_results[0])
+        """
+        request = {"features": features, "input_uri": gcs_uri}
+
+        if videointelligence_v1.Feature.SPEECH_TRANSCRIPTION in features:
+            config = videointelligence_v1.SpeechTranscriptionConfig(
+                language_code="ja-JP",
+                enable_automatic_punctuation=True,
+            )
+            request["video_context"] = videointelligence_v1.VideoContext(
+                speech_transcription_config=config
+            )
+
+        operation = self.video_client.annotate_video(request=request)
         result = operation.result(timeout=600)  # 10分のタイムアウト
 
-        return self._parse_video_analysis(result)
+        return result.annotation_results[0]
 
-    def _parse_video_analysis(self, result: Any) -> Dict[str, Any]:
+    def _parse_video_analysis(self, annotation_results: List[Any]) -> VideoData:
         """
         Video Intelligence APIの結果をパース
         Args:
-            result: API レスポンス
+            annotation_results: 機能ごとの分析結果のリスト
         Returns:
-            Dict: パース済みの分析結果
+            VideoData: パース済みの分析結果
         """
-        video_data = {
-            "labels": [],
-            "scenes": [],
-            "transcript": "",
-        }
+        # ラベル情報の取得 (同じラベルは最も高い信頼度のもの1件にまとめる)
+        best_confidences: Dict[str, float] = {}
+        for annotation_result in annotation_results:
+            for label in annotation_result.shot_label_annotations:
+                description = label.entity.description
+                confidence = label.frames[0].confidence
+                if confidence > best_confidences.get(description, -1.0):
+                    best_confidences[description] = confidence
 
-        # ラベル情報の取得
-        for label in result.annotation_results[0].shot_label_annotations:
-            video_data["labels"].append(
-                {
-                    "description": label.entity.description,
-                    "confidence": label.frames[0].confidence,
-                }
-            )
+        labels = [
+            Label(description=sys.intern(description), confidence=confidence)
+            for description, confidence in best_confidences.items()
+        ]
 
         # シーン情報の取得
-        for shot in result.annotation_results[0].shot_annotations:
-            start_time = shot.start_time_offset.total_seconds()
-            end_time = shot.end_time_offset.total_seconds()
-            video_data["scenes"].append(
-                {"start_time": start_time, "end_time": end_time}
+        scenes = [
+            Scene(
+                start_time=shot.start_time_offset.total_seconds(),
+                end_time=shot.end_time_offset.total_seconds(),
             )
+            for annotation_result in annotation_results
+            for shot in annotation_result.shot_annotations
+        ]
 
-        # 音声テキストの取得
-        for transcript in result.annotation_results[0].speech_transcriptions:
-            for alternative in transcript.alternatives:
-                video_data["transcript"] += alternative.transcript + " "
+        # 音声テキストの取得 (文字列の連結を繰り返さず、最後にまとめて結合する)
+        transcript = " ".join(
+            alternative.transcript
+            for annotation_result in annotation_results
+            for speech_transcription in annotation_result.speech_transcriptions
+            for alternative in speech_transcription.alternatives
+        )
 
-        return video_data
+        return VideoData(labels=labels, scenes=scenes, transcript=transcript)
 
-    def generate_embeddings(self, text: str) -> List[float]:
+    def generate_embeddings(
+        self, text: str, video_id: Optional[str] = None
+    ) -> List[float]:
         """
-        テキストのベクトル埋め込みを生成
+        テキストのベクトル埋め込みを生成 (キャッシュ済みの場合は再利用)
         Args:
             text: 入力テキスト
+            video_id: テキストを所有する動画ID (保存時のキャッシュ破棄に使用)
         Returns:
             List[float]: ベクトル埋め込み
         """
-        model = aiplatform.TextEmbeddingModel.from_pretrained("textembedding-gecko@001")
-        embeddings = model.get_embeddings([text])
-        return embeddings[0].values
+        cached = self._embedding_cache.get(text)
+        if cached is not None:
+            return cached
+
+        values = self.embedding_model.get_embeddings([text])[0].values
+
+        self._embedding_cache.set(text, values, owner=video_id)
+        return values
+
+    def generate_embeddings_batch(
+        self, texts: List[str], batch_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        複数テキストのベクトル埋め込みをまとめて生成
+        Args:
+            texts: 入力テキストのリスト
+            batch_size: 1回のAPI呼び出しで送るテキストの最大数 (省略時はembedding_batch_size)
+        Returns:
+            List[List[float]]: 入力と同じ順序のベクトル埋め込みのリスト
+        """
+        batch_size = batch_size or self.embedding_batch_size
+        embeddings: Dict[str, List[float]] = {}
+        for text in texts:
+            if text not in embeddings:
+                cached = self._embedding_cache.get(text)
+                if cached is not None:
+                    embeddings[text] = cached
 
-    def store_vectors(self, vector_data: List[float], metadata: Dict[str, Any]) -> None:
+        # キャッシュにないテキストのみをバッチでAPIに送る
+        missing = list(dict.fromkeys(text for text in texts if text not in embeddings))
+        for i in range(0, len(missing), batch_size):
+            chunk = missing[i : i + batch_size]
+            for text, embedding in zip(
+                chunk, self.embedding_model.get_embeddings(chunk)
+            ):
+                embeddings[text] = embedding.values
+                self._embedding_cache.set(text, embedding.values)
+
+        return [embeddings[text] for text in texts]
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        埋め込みキャッシュと検索結果キャッシュの統計情報を取得
+        Returns:
+            Dict: キャッシュごとのヒット数、ミス数、破棄数など
+        """
+        return {
+            "embedding_cache": self._embedding_cache.stats(),
+            "quantized_result_cache": self._quantized_result_cache.stats(),
+            "result_cache": self._result_cache.stats(),
+        }
+
+    def store_vectors(self, vector_data: List[float], metadata: VideoMetadata) -> None:
         """
         Vertex AI Vector Searchにベクトルデータを保存
+        (upsert_batch_size件たまるか、upsert_flush_interval秒経過した時点でまとめて保存)
         Args:
             vector_data: ベクトルデータ
             metadata: 関連するメタデータ
         """
-        self.index.upsert_embeddings(
-            embeddings=[vector_data], ids=[metadata["video_id"]], parameters=metadata
-        )
+        with self._upsert_lock:
+            self._pending_upserts[metadata.video_id] = (vector_data, metadata)
+            # 保存の再試行を待っている間は、予約済みの再試行に任せる
+            should_flush = (
+                len(self._pending_upserts) >= self.upsert_batch_size
+                and self._upsert_failures == 0
+            )
+            if not should_flush:
+                self._schedule_flush()
+
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        保存待ちのベクトルを1回のAPI呼び出しでインデックスに保存
+        (失敗した場合は保存待ちに戻し、間隔を空けて再試行する)
+        Returns:
+            int: 保存した件数
+        """
+        with self._upsert_lock:
+            pending = self._pending_upserts
+            self._pending_upserts = {}
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+        if not pending:
+            return 0
+
+        video_ids = list(pending)
+        try:
+            self.index.upsert_embeddings(
+                embeddings=[vector_data for vector_data, _ in pending.values()],
+                ids=video_ids,
+                parameters=[
+                    msgspec.to_builtins(metadata) for _, metadata in pending.values()
+                ],
+            )
+        except Exception:
+            with self._upsert_lock:
+                self._upsert_failures += 1
+                failures = self._upsert_failures
+                if failures > self.upsert_max_retries:
+                    # 上限まで再試行しても保存できなかったベクトルは破棄する
+                    # (その間に保存待ちになった新しいベクトルは残す)
+                    self._upsert_failures = 0
+                    dropped = [
+                        video_id
+                        for video_id in video_ids
+                        if video_id not in self._pending_upserts
+                    ]
+                    if self._pending_upserts:
+                        self._schedule_flush()
+                else:
+                    # より新しいベクトルがなければ保存待ちに戻す
+                    for video_id, item in pending.items():
+                        self._pending_upserts.setdefault(video_id, item)
+                    self._schedule_flush(self.upsert_flush_interval * 2**failures)
+
+            if failures > self.upsert_max_retries:
+                logger.exception(
+                    "Giving up upserting vectors for %s after %d attempts",
+                    ", ".join(dropped),
+                    failures,
+                )
+            else:
+                logger.exception(
+                    "Error upserting %d vectors (attempt %d), retrying",
+                    len(video_ids),
+                    failures,
+                )
+            return 0
+
+        with self._upsert_lock:
+            self._upsert_failures = 0
+
+        # 更新された動画に紐づくキャッシュを破棄
+        for video_id in video_ids:
+            self._embedding_cache.invalidate(video_id)
+        self._quantized_result_cache.invalidate()
+        self._result_cache.invalidate()
+
+        logger.info("Upserted %d vectors", len(video_ids))
+        return len(video_ids)
+
+    def _schedule_flush(self, delay: Optional[float] = None) -> None:
+        """
+        一定時間後の保存を予約 (_upsert_lockを取得した状態で呼び出す)
+        Args:
+            delay: 保存までの秒数 (指定した場合は予約済みの保存を置き換える)
+        """
+        if delay is not None and self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(
+                self.upsert_flush_interval if delay is None else delay,
+                self._flush_in_background,
+            )
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_in_background(self) -> None:
+        """
+        タイマーから呼び出される保存処理
+        """
+        with self._upsert_lock:
+            self._flush_timer = None
+
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Error upserting vectors")
 
     def search_videos(
-        self, query_embedding: List[float], limit: int = 5
+        self,
+        query_embedding: List[float],
+        limit: int = 5,
+        include_metadata: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         ベクトル検索を実行
         Args:
             query_embedding: 検索クエリのベクトル
             limit: 返す結果の最大数
+            include_metadata: 結果にメタデータを含めるかどうか
         Returns:
             List[Dict]: 検索結果のリスト
         """
-        results = self.index.find_neighbors(
-            query_embeddings=[query_embedding], num_neighbors=limit
-        )
+        return self.search_videos_batch([query_embedding], limit, include_metadata)[0]
 
-        return [
-            {
-                "video_id": result.id,
-                "score": result.distance,
-                "metadata": result.parameters,
-            }
-            for result in results[0]
+    def search_videos_batch(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int = 5,
+        include_metadata: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        複数クエリのベクトル検索を1回のAPI呼び出しで実行
+        (類似したクエリの検索結果がキャッシュにあれば再利用)
+        Args:
+            query_embeddings: 検索クエリのベクトルのリスト
+            limit: クエリごとに返す結果の最大数
+            include_metadata: 結果にメタデータを含めるかどうか
+        Returns:
+            List[List[Dict]]: 入力と同じ順序の検索結果のリスト
+        """
+        if include_metadata:
+            # メタデータ (文字起こし全文など) を含む結果はメモリを圧迫するためキャッシュしない
+            neighbors_list = self.index.find_neighbors(
+                query_embeddings=query_embeddings, num_neighbors=limit
+            )
+            return [
+                [
+                    {
+                        "video_id": result.id,
+                        "score": result.distance,
+                        "metadata": result.parameters,
+                    }
+                    for result in neighbors
+                ]
+                for neighbors in neighbors_list
+            ]
+
+        results: List[Optional[List[Dict[str, Any]]]] = [
+            self._get_cached_results(query_embedding, limit)
+            for query_embedding in query_embeddings
         ]
 
-    def process_video(self, gcs_uri: str, video_id: str) -> Dict[str, Any]:
+        # キャッシュにないクエリのみをまとめて検索
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if missing:
+            neighbors_list = self.index.find_neighbors(
+                query_embeddings=[query_embeddings[i] for i in missing],
+                num_neighbors=limit,
+            )
+            for i, neighbors in zip(missing, neighbors_list):
+                results[i] = [
+                    {"video_id": result.id, "score": result.distance}
+                    for result in neighbors
+                ]
+                self._quantized_result_cache.set(query_embeddings[i], limit, results[i])
+                self._result_cache.set(query_embeddings[i], limit, results[i])
+
+        return results
+
+    def _get_cached_results(
+        self, query_embedding: List[float], limit: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        キャッシュから検索結果を取得
+        Args:
+            query_embedding: 検索クエリのベクトル
+            limit: 返す結果の最大数
+        Returns:
+            Optional[List[Dict]]: キャッシュ済みの検索結果、なければNone
+        """
+        results = self._quantized_result_cache.get(query_embedding, limit)
+        if results is not None:
+            return results
+
+        # 類似クエリの結果は量子化キャッシュに書き戻さない
+        # (書き戻すと、元の結果より長く有効期限が延びてしまう)
+        return self._result_cache.get(query_embedding, limit)
+
+    def process_video(self, gcs_uri: str, video_id: str) -> ProcessVideoResult:
         """
         動画処理のメインフロー
         Args:
             gcs_uri: Cloud Storage上の動画のURI
             video_id: 動画の一意識別子
         Returns:
-            Dict: 処理結果
+            ProcessVideoResult: 処理結果
         """
         try:
-            # 1. 動画分析
-            video_data = self.analyze_video(gcs_uri)
+            # 1. 動画分析 (キャッシュ済みの分析結果があれば再利用)
+            video_data = self.analyze_video_cached(gcs_uri)
 
             # 2. 検索用テキストの作成
-            search_text = f"{' '.join([label['description'] for label in video_data['labels']])} {video_data['transcript']}"
+            search_text = f"{' '.join([label.description for label in video_data.labels])} {video_data.transcript}"
 
             # 3. ベクトル埋め込みの生成
-            embeddings = self.generate_embeddings(search_text)
+            embeddings = self.generate_embeddings(search_text, video_id=video_id)
 
             # 4. メタデータの作成
-            metadata = {
-                "video_id": video_id,
-                "gcs_uri": gcs_uri,
-                "labels": video_data["labels"],
-                "scenes": video_data["scenes"],
-                "transcript": video_data["transcript"],
-            }
+            metadata = VideoMetadata(
+                video_id=video_id,
+                gcs_uri=gcs_uri,
+                labels=video_data.labels,
+                scenes=video_data.scenes,
+                transcript=video_data.transcript,
+            )
 
             # 5. ベクトルデータの保存
             self.store_vectors(embeddings, metadata)
 
-            return {"status": "success", "video_id": video_id, "metadata": metadata}
+            return ProcessVideoResult(
+                status="success", video_id=video_id, metadata=metadata
+            )
 
         except Exception as e:
-            print(f"Error processing video: {str(e)}")
-            return {"status": "error", "video_id": video_id, "error": str(e)}
+            logger.exception("Error processing video %s", video_id)
+            return ProcessVideoResult(status="error", video_id=video_id, error=str(e))